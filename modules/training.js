@@ -58,9 +58,9 @@ export class TrainingManager {
                     
                     // Add server samples that don't already exist locally
                     samples.forEach(sample => {
-                        // Simple comparison to avoid duplicates
+                        // Tolerant comparison to avoid duplicates of quantized server copies
                         const exists = this.trainingData[gesture].some(existing => 
-                            JSON.stringify(existing) === JSON.stringify(sample)
+                            this.isSameSample(existing, sample)
                         );
                         
                         if (!exists) {
@@ -136,6 +136,25 @@ export class TrainingManager {
         return this.trainingData[gesture] ? this.trainingData[gesture].length : 0;
     }
 
+    /**
+     * Check whether two samples are the same capture
+     * The server stores coordinates at 1e-4 resolution, so they only need to agree that closely
+     * @param {Array} sample1 - First set of landmarks
+     * @param {Array} sample2 - Second set of landmarks
+     * @returns {boolean} True if every coordinate matches within the server's precision
+     */
+    isSameSample(sample1, sample2) {
+        if (sample1.length !== sample2.length) {
+            return false;
+        }
+        
+        return sample1.every((point, i) =>
+            Math.abs(point.x - sample2[i].x) <= 1e-4 &&
+            Math.abs(point.y - sample2[i].y) <= 1e-4 &&
+            Math.abs(point.z - sample2[i].z) <= 1e-4
+        );
+    }
+
     /**
      * Calculate Euclidean distance between two hand poses
      * Used to find the closest matching training sample
@@ -6,132 +6,733 @@ Run with: python3 server.py
 """
 
 import os
+import sys
 import json
+import gzip
+import zlib
+import hashlib
+import mmap
+import struct
+import itertools
+import operator
+import time
+import queue
+import signal
+import socket
 import http.server
-import socketserver
-from datetime import datetime
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, parse_qs
 
+# orjson is optional - it parses/serializes landmark arrays several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configuration
 PORT = 8000
 TRAINING_DATA_DIR = "training-data"  # Directory to store training samples
 
+# Each gesture folder holds an append-only binary store of samples: a header
+# (magic, array typecode, dims, landmarks per sample) followed by fixed-size
+# little-endian records of x, y, z per landmark. The sample count follows from
+# the file size.
+BINARY_STORE = "samples.bin"
+_BINARY_MAGIC = b'ASLS'
+_BINARY_HEADER = struct.Struct('<4scBH')
+# Record formats by typecode: (numpy-style dtype, steps per unit). New stores
+# keep coordinates as int16 fixed point - MediaPipe landmarks are normalized
+# to the frame, so 1e-4 resolution is finer than their own jitter and +/-3.27
+# still covers hands partly out of frame. float64 stores are still read and appended to
+_STORE_FORMATS = {b'h': ('<i2', 10000), b'd': ('<f8', 1)}
+_NEW_STORE_TYPECODE = b'h'
+_AXES = ('x', 'y', 'z')
+
+# Serialized training data per gesture folder, keyed by folder name with its version
+# Each entry holds a future so concurrent loads share a single read of the folder
+# The joined response is kept with its ETag until a gesture version changes
+_CACHE = {'gestures': {}, 'response': None}
+_CACHE_LOCK = threading.Lock()
+
+# Worker pool for reading gesture folders - file reads are I/O bound so the GIL isn't a bottleneck
+_LOAD_EXECUTOR = ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 4)
+
+# Gestures invalidated by saves, re-read in the background by refresh_worker
+_REFRESH_QUEUE = queue.Queue()
+_REFRESH_DELAY = 1.0  # Seconds to let a burst of saves settle before re-reading
+_POLL_INTERVAL = 5.0  # Seconds between checks for changes made outside the server
+_SHUTTING_DOWN = threading.Event()  # Set by server_close so the refresher knows to stop
+
+# Saved samples waiting for write_worker, which flushes them in batches
+_WRITE_QUEUE = queue.Queue()
+_WRITE_PENDING = threading.Event()
+_FLUSH_INTERVAL = 0.25  # Seconds of saves coalesced into one write per gesture
+_FLUSH_LOCK = threading.Lock()  # Held for a whole flush so server_close can wait out the worker's
+
+# One lock per gesture folder so concurrent saves can't pick the same filename
+_GESTURE_LOCKS = {}
+
+# CORS headers every response carries, encoded once instead of per request
+_CORS_HEADERS = (
+    b'Access-Control-Allow-Origin: *\r\n'
+    b'Access-Control-Allow-Methods: POST, GET, OPTIONS\r\n'
+    b'Access-Control-Allow-Headers: Content-Type\r\n'
+)
+
+def json_loads(data):
+    """Parse JSON from bytes, str or a memoryview, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+def json_dumps(obj, indent=False):
+    """Serialize an object to JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+def read_json_file(filepath):
+    """Parse a JSON file straight from a read-only memory map, skipping the copy into a bytes object"""
+    with open(filepath, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            return json_loads(view)
+
+def encode_record(landmarks, typecode):
+    """Pack a sample's landmarks into a store record, or return None if they can't be represented"""
+    if not landmarks:
+        return None
+    scale = _STORE_FORMATS[typecode][1]
+    try:
+        values = [point[axis] for point in landmarks for axis in _AXES]
+        if scale != 1:
+            values = [round(value * scale) for value in values]
+        record = array(typecode.decode(), values)
+    except (TypeError, KeyError, ValueError, OverflowError):
+        return None
+    if sys.byteorder == 'big':
+        record.byteswap()
+    return record
+
+def append_binary_samples(gesture_dir, batch):
+    """
+    Append a batch of samples to a gesture's binary store with a single write and fsync
+    Returns the indices of samples that don't fit the store's record layout, so the caller can save them as JSON
+    Callers must hold the gesture's lock
+    """
+    filepath = os.path.join(gesture_dir, BINARY_STORE)
+    try:
+        f = open(filepath, 'r+b')
+    except FileNotFoundError:
+        f = None
+    
+    try:
+        if f is None:
+            typecode, count = _NEW_STORE_TYPECODE, None
+        else:
+            try:
+                typecode, count, record_size = read_binary_header(f.read(_BINARY_HEADER.size))
+            except (ValueError, struct.error):
+                return list(range(len(batch)))
+        
+        records = []
+        rejected = []
+        for index, landmarks in enumerate(batch):
+            record = encode_record(landmarks, typecode)
+            if record is None or (count is not None and len(landmarks) != count):
+                rejected.append(index)
+                continue
+            # The first sample of a new store sets its landmarks per sample
+            count = len(landmarks)
+            records.append(record.tobytes())
+        if not records:
+            return rejected
+        
+        if f is None:
+            f = open(filepath, 'wb')
+            records.insert(0, _BINARY_HEADER.pack(_BINARY_MAGIC, typecode, len(_AXES), count))
+        else:
+            # Drop a record left half-written by a crash so later records stay aligned
+            size = f.seek(0, os.SEEK_END)
+            partial = (size - _BINARY_HEADER.size) % record_size
+            if partial:
+                f.seek(f.truncate(size - partial))
+        
+        f.write(b''.join(records))
+        f.flush()
+        os.fsync(f.fileno())
+        return rejected
+    finally:
+        if f is not None:
+            f.close()
+
+def read_binary_header(data):
+    """Validate a binary store header, returning its typecode, landmarks per sample and record size in bytes"""
+    magic, typecode, dims, count = _BINARY_HEADER.unpack_from(data)
+    if magic != _BINARY_MAGIC or typecode not in _STORE_FORMATS or dims != len(_AXES) or not count:
+        raise ValueError("unrecognized sample store header")
+    return typecode, count, count * dims * array(typecode.decode()).itemsize
+
+def read_binary_samples(filepath):
+    """Read every sample from a gesture's binary store as lists of landmark dicts"""
+    with open(filepath, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            typecode, count, record_size = read_binary_header(view)
+            values = array(typecode.decode())
+            total = (len(view) - _BINARY_HEADER.size) // record_size
+            values.frombytes(view[_BINARY_HEADER.size:_BINARY_HEADER.size + total * record_size])
+    
+    if sys.byteorder == 'big':
+        values.byteswap()
+    # zip over one shared iterator walks the values three at a time, which is about
+    # a third faster than indexing since this loop runs once per landmark
+    scale = _STORE_FORMATS[typecode][1]
+    coords = iter(values) if scale == 1 else map(operator.truediv, values, itertools.repeat(scale))
+    points = [{'x': x, 'y': y, 'z': z} for x, y, z in zip(coords, coords, coords)]
+    return [points[i:i + count] for i in range(0, len(points), count)]
+
+def binary_store_blocks():
+    """
+    List (gesture name, store path, samples, landmarks per sample, byte size, typecode) for every binary store
+    Sizes are fixed here, so samples appended while a response streams wait for the next request
+    """
+    blocks = []
+    if not os.path.exists(TRAINING_DATA_DIR):
+        return blocks
+    
+    with os.scandir(TRAINING_DATA_DIR) as entries:
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            filepath = os.path.join(entry.path, BINARY_STORE)
+            try:
+                with open(filepath, 'rb') as f:
+                    typecode, count, record_size = read_binary_header(f.read(_BINARY_HEADER.size))
+                    samples = (os.fstat(f.fileno()).st_size - _BINARY_HEADER.size) // record_size
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"Error reading {filepath}: {e}")
+                continue
+            # Convert folder name back to gesture name
+            gesture_name = entry.name.replace('_', '/')
+            blocks.append((gesture_name, filepath, samples, count, samples * record_size, typecode))
+    return blocks
+
+def load_gesture_samples(gesture_path):
+    """Read the landmarks array from a gesture folder's binary store and every JSON sample in it"""
+    samples = []
+    binary_path = os.path.join(gesture_path, BINARY_STORE)
+    if os.path.exists(binary_path):
+        try:
+            samples.extend(read_binary_samples(binary_path))
+        except Exception as e:
+            print(f"Error reading {binary_path}: {e}")
+    
+    # DirEntry caches its type, saving a stat call per file
+    with os.scandir(gesture_path) as files:
+        filepaths = [
+            file.path for file in files
+            if file.name.endswith('.json') and file.is_file(follow_symlinks=False)
+        ]
+    
+    # Ask the kernel to start reading every file now, so later files are
+    # already in the page cache while earlier ones are being parsed
+    if hasattr(os, 'posix_fadvise'):
+        for filepath in filepaths:
+            try:
+                fd = os.open(filepath, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass  # Reported when the file is actually read below
+    
+    for filepath in filepaths:
+        try:
+            data = read_json_file(filepath)
+            # Extract landmarks array from saved data
+            if 'landmarks' in data:
+                samples.append(data['landmarks'])
+        except Exception as e:
+            print(f"Error reading {filepath}: {e}")
+    return samples
+
+def load_gesture_fragment(gesture_folder, gesture_path):
+    """Serialize one gesture folder as a "gesture": [samples] JSON member"""
+    # Convert folder name back to gesture name (underscore to slash)
+    gesture_name = gesture_folder.replace('_', '/')
+    return json_dumps(gesture_name) + b':' + json_dumps(load_gesture_samples(gesture_path))
+
+def load_training_data():
+    """
+    Return (response, etag) for all training data
+    While nothing has changed, response is the cached JSON bytes with its ETag; otherwise it is
+    a generator yielding the JSON one gesture at a time, which caches the whole body once exhausted
+    Gesture folders are only re-read when their version has changed since the last load
+    """
+    if not os.path.exists(TRAINING_DATA_DIR):
+        return json_dumps({}), None
+    
+    with _CACHE_LOCK:
+        gestures = _refresh_cache()
+        key = frozenset((folder, cached['version']) for folder, cached in _CACHE['gestures'].items())
+        cached_response = _CACHE['response']
+    
+    if cached_response is not None and cached_response['key'] == key:
+        return cached_response['body'], cached_response['etag']
+    return _stream_training_data(gestures, key), None
+
+def gzip_response(body):
+    """Gzip a load response, compressing the cached response only once"""
+    with _CACHE_LOCK:
+        cached_response = _CACHE['response']
+    if cached_response is None or cached_response['body'] is not body:
+        return gzip.compress(body, compresslevel=1, mtime=0)
+    if cached_response.get('gzip') is None:
+        cached_response['gzip'] = gzip.compress(body, compresslevel=1, mtime=0)
+    return cached_response['gzip']
+
+def _stream_training_data(gestures, key):
+    """Yield the response one gesture fragment at a time, then cache the joined body"""
+    parts = [b'{']
+    yield b'{'
+    for index, (gesture_folder, fragment) in enumerate(gestures.items()):
+        try:
+            part = (b',' if index else b'') + fragment.result()
+        except Exception:
+            # Retry the folder on the next load instead of caching the failure
+            with _CACHE_LOCK:
+                _CACHE['gestures'].pop(gesture_folder, None)
+            raise
+        parts.append(part)
+        yield part
+    parts.append(b'}')
+    yield b'}'
+    
+    body = b''.join(parts)
+    etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+    with _CACHE_LOCK:
+        _CACHE['response'] = {'key': key, 'body': body, 'etag': etag}
+
+def _refresh_cache():
+    """Submit changed gesture folders for re-reading and return each folder's fragment future"""
+    gestures = {}
+    
+    # Iterate through gesture folders
+    with os.scandir(TRAINING_DATA_DIR) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                version = gesture_version(entry.path, entry.stat().st_mtime_ns)
+                gestures[entry.name] = _cache_gesture(entry.name, entry.path, version)
+    
+    # Folders removed since the last load drop out of the cache here
+    _CACHE['gestures'] = gestures
+    return {folder: cached['fragment'] for folder, cached in gestures.items()}
+
+def gesture_version(gesture_path, mtime):
+    """
+    Identify the current contents of a gesture folder
+    Appending to the binary store doesn't change the folder mtime, so the store's size is included
+    """
+    try:
+        return (mtime, os.stat(os.path.join(gesture_path, BINARY_STORE)).st_size)
+    except FileNotFoundError:
+        return (mtime, 0)
+
+def _cache_gesture(gesture_folder, gesture_path, version):
+    """Return the cache entry for a gesture folder, submitting a re-read if it is stale"""
+    cached = _CACHE['gestures'].get(gesture_folder)
+    if cached is None or cached['version'] != version:
+        # Gesture folders are independent, so stale ones are re-read in parallel
+        fragment = _LOAD_EXECUTOR.submit(load_gesture_fragment, gesture_folder, gesture_path)
+        cached = {'version': version, 'fragment': fragment}
+        _CACHE['gestures'][gesture_folder] = cached
+    return cached
+
+def invalidate_gesture(gesture_folder):
+    """Drop a gesture from the cache and queue it to be re-read in the background"""
+    with _CACHE_LOCK:
+        _CACHE['gestures'].pop(gesture_folder, None)
+        _CACHE['response'] = None
+    _REFRESH_QUEUE.put(gesture_folder)
+
+def refresh_worker():
+    """
+    Keep the cache warm so loads are served from memory instead of waiting on disk
+    Re-reads gestures invalidated by saves and polls for changes made outside the server
+    """
+    while True:
+        try:
+            try:
+                gesture_folder = _REFRESH_QUEUE.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                # Nothing saved lately - pick up folders added or edited by hand
+                if os.path.exists(TRAINING_DATA_DIR):
+                    with _CACHE_LOCK:
+                        _refresh_cache()
+                continue
+            
+            # Let a burst of saves settle, then re-read each gesture once
+            time.sleep(_REFRESH_DELAY)
+            pending = {gesture_folder}
+            while not _REFRESH_QUEUE.empty():
+                pending.add(_REFRESH_QUEUE.get_nowait())
+            
+            with _CACHE_LOCK:
+                for gesture_folder in pending:
+                    gesture_path = os.path.join(TRAINING_DATA_DIR, gesture_folder)
+                    if os.path.isdir(gesture_path):
+                        version = gesture_version(gesture_path, os.stat(gesture_path).st_mtime_ns)
+                        _cache_gesture(gesture_folder, gesture_path, version)
+        except Exception as e:
+            # The load pool refuses new work once the server or interpreter is shutting down
+            if _SHUTTING_DOWN.is_set() or sys.is_finalizing():
+                return
+            print(f"Error refreshing training data cache: {e}")
+
+def save_samples(gesture_folder, samples):
+    """Append a batch of samples to a gesture's binary store, saving any that don't fit as JSON files"""
+    gesture_dir = os.path.join(TRAINING_DATA_DIR, gesture_folder)
+    os.makedirs(gesture_dir, exist_ok=True)
+    
+    with gesture_lock(gesture_folder):
+        rejected = append_binary_samples(gesture_dir, [data.get('landmarks') for data in samples])
+        for index in rejected:
+            # Nanosecond timestamps keep filenames sortable without any string
+            # rewriting; samples saved in the same clock tick get a numeric suffix
+            filepath = os.path.join(gesture_dir, f"{gesture_folder}_{time.time_ns()}.json")
+            base, ext = os.path.splitext(filepath)
+            suffix = 1
+            while os.path.exists(filepath):
+                filepath = f"{base}-{suffix}{ext}"
+                suffix += 1
+            
+            with open(filepath, 'wb') as f:
+                f.write(json_dumps(samples[index], indent='--verbose' in sys.argv))
+        invalidate_gesture(gesture_folder)
+
+def flush_pending_writes():
+    """Write every queued sample to disk, one batch per gesture"""
+    with _FLUSH_LOCK:
+        batches = {}
+        while True:
+            try:
+                gesture_folder, data = _WRITE_QUEUE.get_nowait()
+            except queue.Empty:
+                break
+            batches.setdefault(gesture_folder, []).append(data)
+        
+        for gesture_folder, samples in batches.items():
+            try:
+                save_samples(gesture_folder, samples)
+            except Exception as e:
+                print(f"Error saving {len(samples)} samples for {gesture_folder}: {e}")
+
+def write_worker():
+    """
+    Coalesce saves so a burst of samples costs one write and fsync per gesture
+    instead of one file per sample
+    """
+    while True:
+        _WRITE_PENDING.wait()
+        # Give the rest of the burst time to arrive
+        time.sleep(_FLUSH_INTERVAL)
+        _WRITE_PENDING.clear()
+        flush_pending_writes()
+
+def gesture_lock(gesture_folder):
+    """Return the lock guarding writes to a gesture folder"""
+    # dict.setdefault is atomic, so two threads always get the same lock
+    return _GESTURE_LOCKS.setdefault(gesture_folder, threading.Lock())
+
+class ASLServer(http.server.ThreadingHTTPServer):
+    """
+    Threaded HTTP server that handles requests on a bounded worker pool
+    Reuses pooled threads instead of spawning one per request
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 64
+    max_workers = 16
+    
+    def __init__(self, *args, **kwargs):
+        # Set up before binding - a failed bind calls server_close, which uses both
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.connections = set()
+        self._bound = False
+        super().__init__(*args, **kwargs)
+        self._bound = True
+        
+        # Prepare the next load in the background while requests are served
+        threading.Thread(target=refresh_worker, daemon=True).start()
+        threading.Thread(target=write_worker, daemon=True).start()
+    
+    def process_request(self, request, client_address):
+        """Hand the connection off to the worker pool"""
+        self.connections.add(request)
+        self.executor.submit(self.process_request_thread, request, client_address)
+    
+    def shutdown_request(self, request):
+        self.connections.discard(request)
+        super().shutdown_request(request)
+    
+    def server_close(self):
+        # A failed bind lands here too, and mustn't stop the refresher of the server that binds next
+        if self._bound:
+            _SHUTTING_DOWN.set()
+        super().server_close()
+        # Wake workers blocked on idle keep-alive connections so the pool can exit
+        for request in list(self.connections):
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        # Let in-flight requests finish queuing their samples, their sockets are already shut down
+        self.executor.shutdown(wait=True)
+        # Don't lose samples still waiting for the write worker - this also waits
+        # for a batch the worker is partway through writing
+        flush_pending_writes()
+
 class ASLRequestHandler(http.server.SimpleHTTPRequestHandler):
     """
     Custom request handler extending SimpleHTTPRequestHandler
     Adds API endpoints for training data management
     """
     
+    # Keep connections alive between requests; idle ones hand their worker back after the timeout
+    protocol_version = 'HTTP/1.1'
+    timeout = 30
+    # Headers and body go out in separate sends; with Nagle on, the body of a small
+    # response waits for the client's delayed ACK (~40ms) on a kept-alive connection
+    disable_nagle_algorithm = True
+    
     def do_GET(self):
         """Handle GET requests"""
-        if self.path == '/api/training-data/load':
-            # API endpoint to load all training data from disk
-            try:
-                # Collect all training data from the training-data directory
-                all_training_data = {}
-                
-                if os.path.exists(TRAINING_DATA_DIR):
-                    # Iterate through gesture folders
-                    for gesture_folder in os.listdir(TRAINING_DATA_DIR):
-                        gesture_path = os.path.join(TRAINING_DATA_DIR, gesture_folder)
-                        
-                        if os.path.isdir(gesture_path):
-                            # Convert folder name back to gesture name (underscore to slash)
-                            gesture_name = gesture_folder.replace('_', '/')
-                            all_training_data[gesture_name] = []
-                            
-                            # Read all JSON files in the gesture folder
-                            for filename in os.listdir(gesture_path):
-                                if filename.endswith('.json'):
-                                    filepath = os.path.join(gesture_path, filename)
-                                    try:
-                                        with open(filepath, 'r') as f:
-                                            data = json.load(f)
-                                            # Extract landmarks array from saved data
-                                            if 'landmarks' in data:
-                                                all_training_data[gesture_name].append(data['landmarks'])
-                                    except Exception as e:
-                                        print(f"Error reading {filepath}: {e}")
-                
-                # Send successful response with training data
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')  # CORS header
-                self.end_headers()
-                self.wfile.write(json.dumps(all_training_data).encode())
-                
-            except Exception as e:
-                # Send error response
-                self.send_response(500)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)}).encode())
-        else:
+        route = self.GET_ROUTES.get(self.path)
+        if route is None:
             # Default file serving for static files
             super().do_GET()
+        else:
+            route(self)
     
     def do_POST(self):
         """Handle POST requests"""
-        if self.path == '/api/training-data':
-            # API endpoint to save training data
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
+        route = self.POST_ROUTES.get(self.path)
+        if route is None:
+            # Unknown endpoint - its body is left unread, so the connection can't be reused
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+        else:
+            route(self)
+    
+    def handle_load(self):
+        """API endpoint to load all training data from disk"""
+        try:
+            response, etag = load_training_data()
             
-            try:
-                # Parse JSON data from request
-                data = json.loads(post_data)
-                gesture = data.get('gesture', 'unknown')
-                timestamp = data.get('timestamp', datetime.now().isoformat())
-                
-                # Create gesture directory if it doesn't exist
-                # Replace slash with underscore for filesystem compatibility
-                gesture_dir = os.path.join(TRAINING_DATA_DIR, gesture.replace('/', '_'))
-                os.makedirs(gesture_dir, exist_ok=True)
-                
-                # Save the sample with timestamp in filename
-                # Replace colons in timestamp for filesystem compatibility
-                filename = f"{gesture}_{timestamp.replace(':', '-')}.json"
-                filepath = os.path.join(gesture_dir, filename)
-                
-                # Write JSON data to file with pretty formatting
-                with open(filepath, 'w') as f:
-                    json.dump(data, f, indent=2)
-                
-                # Send success response
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': True, 'file': filepath}).encode())
-                
-            except Exception as e:
-                # Send error response
-                self.send_response(500)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
+        except Exception as e:
+            # Send error response
+            self.send_json(500, {'error': str(e)})
+            return
+        
+        # Level 1 gzip is fast enough that it's cheaper than sending the repetitive JSON as-is
+        gzipped = self.accepts_gzip()
+        
+        if isinstance(response, bytes):
+            if gzipped:
+                response = gzip_response(response)
+                if etag is not None:
+                    # Each encoding of the body is a different representation with its own tag
+                    etag = etag[:-1] + '-gzip"'
+            
+            # Nothing changed since the client's copy - skip the body entirely
+            if_none_match = self.headers.get('If-None-Match', '')
+            if etag is not None and etag in [tag.strip() for tag in if_none_match.split(',')]:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Vary', 'Accept-Encoding')
                 self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)}).encode())
-        else:
-            # Unknown endpoint
-            self.send_response(404)
+                return
+            
+            # Send the cached response with training data
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(response)))
+            self.send_header('Vary', 'Accept-Encoding')
+            if gzipped:
+                self.send_header('Content-Encoding', 'gzip')
+            if etag is not None:
+                # Make clients revalidate with If-None-Match rather than reuse a stale copy
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
             self.end_headers()
+            self.wfile.write(response)
+            return
+        
+        # Send successful response with training data
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Vary', 'Accept-Encoding')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        # HTTP/1.0 clients can't read chunked bodies, so theirs ends when the connection closes
+        chunked = self.request_version != 'HTTP/1.0'
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            # Even if the client asked for keep-alive
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        
+        def write(data):
+            # An empty chunk would end the body early
+            if data and chunked:
+                self.wfile.write(b'%X\r\n%s\r\n' % (len(data), data))
+            elif data:
+                self.wfile.write(data)
+        
+        # Stream one gesture at a time instead of building the whole response
+        try:
+            compressor = zlib.compressobj(1, zlib.DEFLATED, 31) if gzipped else None
+            for fragment in response:
+                write(compressor.compress(fragment) if compressor else fragment)
+            if compressor:
+                write(compressor.flush())
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        except Exception as e:
+            # Headers are already sent, so the client only sees a truncated body
+            print(f"Error streaming training data: {e}")
+            self.close_connection = True
+    
+    def handle_load_binary(self):
+        """API endpoint to load the binary stores without decoding them into Python objects"""
+        try:
+            blocks = binary_store_blocks()
+        except Exception as e:
+            # Send error response
+            self.send_json(500, {'error': str(e)})
+            return
+        
+        # The body is one block per gesture, in layout order, of samples x landmarks x 3
+        # values (x, y, z). Each layout row is [gesture, samples, landmarks, dims, dtype, scale],
+        # where coordinates are the stored values divided by scale. The header is ASCII-only JSON
+        layout = [
+            [name, samples, count, len(_AXES), *_STORE_FORMATS[typecode]]
+            for name, _, samples, count, _, typecode in blocks
+        ]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Access-Control-Expose-Headers', 'X-Training-Data-Layout')
+        self.send_header('X-Training-Data-Layout', json.dumps(layout))
+        self.send_header('Content-Length', str(sum(block[4] for block in blocks)))
+        self.end_headers()
+        
+        # Hand the stored records straight to the socket
+        try:
+            for _, filepath, _, _, size, _ in blocks:
+                # A store without a complete record has a layout row but no bytes,
+                # and socket.sendfile rejects a zero count
+                if not size:
+                    continue
+                with open(filepath, 'rb') as f:
+                    if self.connection.sendfile(f, _BINARY_HEADER.size, size) != size:
+                        raise OSError(f"{filepath} shrank while streaming")
+        except Exception as e:
+            # Headers are already sent, so the client only sees a truncated body
+            print(f"Error streaming binary training data: {e}")
+            self.close_connection = True
+    
+    def handle_save(self):
+        """API endpoint to save training data"""
+        content_length = int(self.headers['Content-Length'])
+        post_data = self.rfile.read(content_length)
+        
+        try:
+            # Parse JSON data from request
+            data = json_loads(post_data)
+            gesture = data.get('gesture', 'unknown')
+            
+            # Replace slash with underscore for filesystem compatibility
+            gesture_folder = gesture.replace('/', '_')
+            
+            # Queue the sample - the write worker batches saves into one write per gesture
+            _WRITE_QUEUE.put((gesture_folder, data))
+            _WRITE_PENDING.set()
+            
+            # Send accepted response, the sample is on disk within the flush interval
+            self.send_json(202, {'success': True})
+            
+        except Exception as e:
+            # Send error response
+            self.send_json(500, {'error': str(e)})
+    
+    def accepts_gzip(self):
+        """Check whether the client's Accept-Encoding allows a gzip response"""
+        for coding in self.headers.get('Accept-Encoding', '').split(','):
+            name, _, params = coding.partition(';')
+            if name.strip().lower() == 'gzip':
+                return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+        return False
+    
+    def send_json(self, status, payload):
+        """Send a complete JSON response with the Content-Length keep-alive needs"""
+        body = json_dumps(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def copyfile(self, source, outputfile):
+        """
+        Send static files with socket.sendfile, which uses os.sendfile so the kernel
+        copies file bytes straight to the socket (falls back to plain sends otherwise)
+        """
+        if outputfile is self.wfile:
+            self.connection.sendfile(source)
+        else:
+            super().copyfile(source, outputfile)
     
     def do_OPTIONS(self):
         """Handle preflight CORS requests"""
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
+    
+    def end_headers(self):
+        """Append the shared CORS headers before the blank line that ends the headers"""
+        if self.request_version != 'HTTP/0.9':
+            self._headers_buffer.append(_CORS_HEADERS)
+        super().end_headers()
+    
+    # Paths of the API endpoints mapped to their handlers, built once with the class
+    GET_ROUTES = {
+        '/api/training-data/load': handle_load,
+        '/api/training-data/load-binary': handle_load_binary,
+    }
+    POST_ROUTES = {
+        '/api/training-data': handle_save,
+    }
 
 if __name__ == "__main__":
     # Create training data directory if it doesn't exist
     os.makedirs(TRAINING_DATA_DIR, exist_ok=True)
     
+    # Exit through server_close on SIGTERM (sent when Electron quits) so queued samples are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
     # Set up and start the server
     Handler = ASLRequestHandler
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+    with ASLServer(("", PORT), Handler) as httpd:
         print(f"Server running at http://localhost:{PORT}/")
         print(f"Training data will be saved to: {os.path.abspath(TRAINING_DATA_DIR)}/")
         print("Press Ctrl-C to stop")